@@ -1,10 +1,17 @@
-from catagories import Catagories
-from test import test_multiple_SCs, SCTest
+from concurrent.futures import ProcessPoolExecutor
+
+from catagories    import Catagories
+from sound_changes import SoundChange, notation_to_SC
+from test          import test_multiple_SCs, fuzz_SC_engines, SCTest, SCTreeTest
 
 # holds input words
 class InputWords:
     pass
 
+# wrong on purpose so that the fuzzer's mismatch report and reproducer are exercised
+def ignore_nontexts_SC(notation: str, catagories: Catagories) -> SoundChange:
+    return notation_to_SC("/".join(notation.split("/")[:3]), catagories)
+
 def main():
     catagories = Catagories("V=aiueo\nC=ptkbdghmnŋslr\nX=ptk\nY=bdg")
 
@@ -66,6 +73,27 @@ def main():
         ),
     ], catagories, True)
 
+    # A and B share two stages, D is a prefix of the others, D and E are duplicates
+    tree_test = SCTreeTest(
+        {
+            "A": ["X/Y/V_V", "a/o/ah_", "mb/mm/V_V"],
+            "B": ["X/Y/V_V", "a/o/ah_", "/j/kt_"],
+            "C": ["X/Y/V_V", "i/j/[V#]_V/_o"],
+            "D": ["X/Y/V_V"],
+            "E": ["X/Y/V_V"],
+            "F": ["ab/\\\\/_"],
+        },
+        ["apa", "naha", "amba", "akto", "kaia", "ab", "apake"]
+    )
+    tree_test.test(catagories)
+    with ProcessPoolExecutor() as executor:
+        tree_test.test(catagories, executor)
+
+    fuzz_SC_engines({
+        "notation_to_SC": notation_to_SC,
+        "ignore_nontexts": ignore_nontexts_SC,
+    }, seed=0)
+
 
 if __name__ == "__main__":
     main()
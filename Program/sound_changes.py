@@ -4,6 +4,7 @@ from operator  import iconcat
 from itertools import filterfalse
 from random    import choice
 
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
 from catagories import Catagories, Catagory
 
 # sound change object used both for detecting contexts where a sound change can occur, and applying sound changes
@@ -492,3 +493,131 @@ class SoundChanges:
                 word = SC.apply_to(word, catagories)
             words[index] = word
         return words
+
+
+# runs a linear chain of cascade stages, module level so it can be sent to worker processes
+# returns the words for every named stage along with the words at the end of the chain
+def _apply_chain(stages: list[tuple[str | None, SoundChanges]], words: list[str], catagories: Catagories) -> tuple[dict[str, list[str]], list[str]]:
+    outputs: dict[str, list[str]] = {}
+    for name, SCs in stages:
+        words = SCs.apply_all(words, catagories)
+        if name != None:
+            outputs[name] = list(words)
+    return outputs, words
+
+# a stage in a language family tree, children inherit the output of their parent
+class SoundChangeTree:
+    def __init__(self, notations: list[str], catagories: Catagories, name: str | None = None, children: list['SoundChangeTree'] | None = None) -> None:
+        self.name = name
+        self.SCs = SoundChanges(notations, catagories)
+        self.parent: SoundChangeTree | None = None
+        self.children: list[SoundChangeTree] = []
+        for child in [] if children == None else children:
+            self.add_child(child)
+
+    # every name in this node and below it
+    def names(self) -> list[str]:
+        names = [] if self.name == None else [self.name]
+        for child in self.children:
+            names += child.names()
+        return names
+
+    # names are used as keys for the outputs so they have to be unique across the whole tree
+    def add_child(self, child: 'SoundChangeTree') -> 'SoundChangeTree':
+        root = self
+        while root.parent != None:
+            root = root.parent
+        if child.parent != None or child is root:
+            raise ValueError("a node can only be added to one tree once")
+        if set(root.names()) & set(child.names()):
+            raise ValueError("node names must be unique within a tree")
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    # builds a tree from flat cascades so that shared leading notations become one stage
+    @staticmethod
+    def from_cascades(cascades: dict[str, list[str]], catagories: Catagories) -> 'SoundChangeTree':
+        if cascades == {}:
+            raise ValueError("there must be at least one cascade to build a tree from")
+
+        def build(names: list[str], depth: int) -> SoundChangeTree:
+            if len(names) == 1:
+                return SoundChangeTree(cascades[names[0]][depth:], catagories, names[0])
+
+            # the stage lasts for as long as every cascade in it has the same notation
+            end = depth
+            while all(
+                len(cascades[name]) > end and cascades[name][end] == cascades[names[0]][end]
+                for name in names
+            ):
+                end += 1
+
+            node = SoundChangeTree(cascades[names[0]][depth:end], catagories)
+
+            # cascades ending here name the node, duplicates get an empty stage of their own
+            finished = [name for name in names if len(cascades[name]) == end]
+            if finished != []:
+                node.name = finished[0]
+            for name in finished[1:]:
+                node.add_child(SoundChangeTree([], catagories, name))
+
+            # the rest branch on their next notation
+            branches: dict[str, list[str]] = {}
+            for name in names:
+                if len(cascades[name]) > end:
+                    branches.setdefault(cascades[name][end], []).append(name)
+            for branch_names in branches.values():
+                node.add_child(build(branch_names, end))
+
+            return node
+
+        return build(list(cascades), 0)
+
+    # nodes from this one down to the first one that doesn't have exactly one child
+    def __chain(self) -> list['SoundChangeTree']:
+        chain = [self]
+        while len(chain[-1].children) == 1:
+            chain.append(chain[-1].children[0])
+        return chain
+
+    # applies every stage once and returns the words for every named node
+    # without an executor the stages run in this process one branch at a time, children share
+    # their parent's lexicon and copy it when they run, except the last which takes it over
+    # with an executor each linear chain of stages is one task, so branches run in parallel
+    # a ProcessPoolExecutor pickles the SoundChanges and lexicon of every task, and on platforms
+    # that spawn workers (windows, macos) the calling script needs an if __name__ == "__main__" guard
+    def apply_all(self, words: list[str], catagories: Catagories, executor: Executor | None = None) -> dict[str, list[str]]:
+        outputs: dict[str, list[str]] = {}
+
+        def stages(chain: list[SoundChangeTree]) -> list[tuple[str | None, SoundChanges]]:
+            return [(node.name, node.SCs) for node in chain]
+
+        if executor == None:
+            # each shared lexicon is kept with the number of children yet to use it
+            pending_nodes: list[tuple[SoundChangeTree, list]] = [(self, [list(words), 1])]
+            while pending_nodes:
+                node, shared = pending_nodes.pop()
+                shared[1] -= 1
+                stage_words = shared[0] if shared[1] == 0 else list(shared[0])
+                chain = node.__chain()
+                chain_outputs, stage_words = _apply_chain(stages(chain), stage_words, catagories)
+                outputs.update(chain_outputs)
+                shared = [stage_words, len(chain[-1].children)]
+                pending_nodes += [(child, shared) for child in chain[-1].children]
+            return outputs
+
+        # futures are kept with the last node of their chain so its children can be submitted
+        def submit(node: SoundChangeTree, stage_words: list[str]) -> tuple[Future, SoundChangeTree]:
+            chain = node.__chain()
+            return executor.submit(_apply_chain, stages(chain), list(stage_words), catagories), chain[-1]
+
+        pending: dict[Future, SoundChangeTree] = dict([submit(self, words)])
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                end = pending.pop(future)
+                chain_outputs, stage_words = future.result()
+                outputs.update(chain_outputs)
+                pending.update(submit(child, stage_words) for child in end.children)
+        return outputs
@@ -1,5 +1,15 @@
+from random        import Random
+from re            import findall, sub
+from time          import perf_counter
+from typing        import Callable
+from concurrent.futures import Executor
+
 from catagories    import Catagory, Catagories
-from sound_changes import SoundChange, notation_to_SC
+from sound_changes import SoundChange, SoundChanges, SoundChangeTree, notation_to_SC
+
+
+# an engine turns a notation into an object with the same apply_to as SoundChange
+SCEngine = Callable[[str, Catagories], SoundChange]
 
 
 # used to debug applying sound changes to words
@@ -22,16 +32,20 @@ class SCTest:
                 "test and output word lists must be the same length"
             )
 
+    # the test as it would be written in a list of tests
+    def __repr__(self) -> str:
+        return f"SCTest({self.notation!r}, {self.test_words!r}, {self.output_words!r})"
+
     # gets the number of test words
     def get_test_words_len(self):
         return len(self.test_words)
 
     # tests to see if the SC applier works as intended and prints the results
-    def test(self, catagories: Catagories, test_index: int = 0, show_success: bool = True) -> tuple[bool, int]:
+    def test(self, catagories: Catagories, test_index: int = 0, show_success: bool = True, engine: SCEngine = notation_to_SC) -> tuple[bool, int]:
         all_successful = True
         number_successful = 0
 
-        SC = notation_to_SC(self.notation, catagories) # conversion of noation into SC object
+        SC = engine(self.notation, catagories) # conversion of noation into SC object
 
         heading_buffer = "#" * (77 - len(f"Testing {self.notation}"))
         print(f"\033[0;34m# Testing {self.notation} {heading_buffer}\033[0m")
@@ -58,6 +72,40 @@ class SCTest:
         return (all_successful, number_successful)
 
 
+# checks that a tree built from several cascades gives the same words as applying each cascade on its own
+class SCTreeTest:
+    def __init__(self, cascades: dict[str, list[str]], test_words: list[str]) -> None:
+        self.cascades = cascades
+        self.test_words = test_words
+
+    # prints each daughter's result, the tree is run in this process unless an executor is given
+    def test(self, catagories: Catagories, executor: Executor | None = None, show_success: bool = True) -> bool:
+        all_successful = True
+
+        tree = SoundChangeTree.from_cascades(self.cascades, catagories)
+        tree_outputs = tree.apply_all(self.test_words, catagories, executor)
+
+        mode = "in parallel" if executor != None else "inline"
+        heading_buffer = "#" * (77 - len(f"Testing tree {mode}"))
+        print(f"\033[0;34m# Testing tree {mode} {heading_buffer}\033[0m")
+
+        for name, notations in self.cascades.items():
+            expected = SoundChanges(notations, catagories).apply_all(list(self.test_words), catagories)
+            actual = tree_outputs.get(name)
+
+            if actual == expected:
+                if show_success:
+                    print(f"{name} \033[1;32mTest Successful\033[0m:\t{actual}")
+                continue
+            print(f"{name} \033[1;31mTest Unsuccessful\033[0m:\t{actual}, expected {expected}")
+            all_successful = False
+
+        foot_buffer = "#" * 80
+        print(f"\033[0;34m{foot_buffer}\033[0m\n")
+
+        return all_successful
+
+
 # allows multiple numbered sound change tests at once
 def test_multiple_SCs(SC_tests: list[SCTest], catagories: Catagories, show_success: bool = True) -> None:
     number_words_successful = 0
@@ -75,3 +123,293 @@ def test_multiple_SCs(SC_tests: list[SCTest], catagories: Catagories, show_succe
 
     print(f"{number_words_successful} / {word_count} words successful.")
     print(f"{number_SCs_successful} / {SC_count} SCs successful.")
+
+
+# seeded generator of random catagories, notations and lexicons for fuzzing
+class SCFuzzer:
+    def __init__(self, seed: int = 0, alphabet: str = "ptkbdgmnslraeiou") -> None:
+        self.seed = seed
+        self.random = Random(seed)
+        self.alphabet = alphabet
+
+    # generates catagories of distinct characters, eg. "V=aeo\nC=ptk"
+    def random_catagories(self, count: int = 3) -> Catagories:
+        symbols = self.random.sample("ABCDEFGHIJKLMNOPQRSTUVWXYZ", count)
+        lines = [
+            symbol + "=" + "".join(self.random.sample(self.alphabet, self.random.randint(2, 5)))
+            for symbol in symbols
+        ]
+        return Catagories("\n".join(lines))
+
+    # generates a word out of the alphabet
+    def random_word(self, min_len: int = 1, max_len: int = 8) -> str:
+        return "".join(
+            self.random.choice(self.alphabet)
+            for _ in range(self.random.randint(min_len, max_len))
+        )
+
+    # generates a lexicon of random words
+    def random_lexicon(self, size: int = 20) -> list[str]:
+        return [self.random_word() for _ in range(size)]
+
+    # a single element of a context, either a literal, a catagory or an optional
+    def __random_context_element(self, catagories: Catagories) -> str:
+        kind = self.random.randint(0, 3)
+        if kind == 0:
+            return self.random.choice(self.alphabet)
+        if kind == 1:
+            return self.random.choice(catagories.catagories).symbol
+        if kind == 2:
+            return "(" + self.random.choice(self.alphabet) + ")"
+        return ""
+
+    # contexts can be anchored to the word edge with #
+    def __random_context(self, catagories: Catagories) -> str:
+        before = self.__random_context_element(catagories)
+        after = self.__random_context_element(catagories)
+        if self.random.random() < 0.2:
+            before = "#" + before
+        if self.random.random() < 0.2:
+            after = after + "#"
+        return before + "_" + after
+
+    # picks an input and output that always reach a fixpoint in apply_to
+    def __random_input_output(self, catagories: Catagories) -> tuple[str, str]:
+        kind = self.random.randint(0, 4)
+
+        # epenthesis only applies once per word
+        if kind == 0:
+            return "", self.random_word(1, 2)
+
+        # metathesis of two different characters, "aa" would swap forever
+        if kind == 1:
+            start, end = self.random.sample(self.alphabet, 2)
+            return start + end, "\\\\"
+
+        # doubling like V²/a/_ always shortens the word
+        if kind == 2:
+            catagory = self.random.choice(catagories.catagories)
+            return catagory.symbol + "²", self.random.choice(catagory.characters)
+
+        # catagory to catagory of the same length, they must not share characters
+        if kind == 3:
+            pairs = [
+                (i_catagory, o_catagory)
+                for i_catagory in catagories.catagories
+                for o_catagory in catagories.catagories
+                if i_catagory.compare_length(o_catagory)
+                and not set(i_catagory.characters) & set(o_catagory.characters)
+            ]
+            if pairs != []:
+                i_catagory, o_catagory = self.random.choice(pairs)
+                return i_catagory.symbol, o_catagory.symbol
+
+        # literals, where the output never reintroduces an input character
+        input_val = self.random_word(1, 2)
+        remaining = "".join(c for c in self.alphabet if c not in input_val)
+        output_val = "".join(
+            self.random.choice(remaining) for _ in range(self.random.randint(0, 2))
+        )
+        return input_val, output_val
+
+    # epenthesis contexts made only of optionals like (p)_(p) can match the empty string,
+    # which makes the overlapping search in SoundChange loop forever
+    def __random_epenthesis_context(self, catagories: Catagories) -> str:
+        context = self.__random_context(catagories)
+        while "(" in context and sub(r"\(.\)", "", context) == "_":
+            context = self.__random_context(catagories)
+        return context
+
+    # generates a full notation, sometimes with a nontext
+    def random_notation(self, catagories: Catagories) -> str:
+        input_val, output_val = self.__random_input_output(catagories)
+        random_context = self.__random_epenthesis_context if input_val == "" else self.__random_context
+        notation = input_val + "/" + output_val + "/" + random_context(catagories)
+        if self.random.random() < 0.25:
+            notation += "/" + random_context(catagories)
+        return notation
+
+
+# builds an engine's SoundChange once, a construction error becomes the outcome for every word
+def build_SC_engine(engine: SCEngine, notation: str, catagories: Catagories) -> SoundChange | str:
+    try:
+        return engine(notation, catagories)
+    except Exception as error:
+        return f"<{type(error).__name__}>"
+
+# the outcome of applying a built SoundChange to a word, errors are compared by type
+def run_SC(SC: SoundChange | str, word: str, catagories: Catagories) -> str:
+    if isinstance(SC, str):
+        return SC
+    try:
+        return SC.apply_to(word, catagories)
+    except Exception as error:
+        return f"<{type(error).__name__}>"
+
+# builds and applies in one go, used where speed doesn't matter
+def run_SC_engine(engine: SCEngine, notation: str, word: str, catagories: Catagories) -> str:
+    return run_SC(build_SC_engine(engine, notation, catagories), word, catagories)
+
+
+# a (rule, word) pair where an engine disagrees with the reference
+class SCMismatch:
+    def __init__(self, engine_name: str, catagories: Catagories, notation: str, word: str, expected: str, actual: str) -> None:
+        self.engine_name = engine_name
+        self.catagories = catagories
+        self.notation = notation
+        self.word = word
+        self.expected = expected
+        self.actual = actual
+
+    # the reproducer as an SCTest so it can be pasted into the test list
+    def to_SCTest(self) -> SCTest:
+        return SCTest(self.notation, [self.word], [self.expected])
+
+    def __str__(self) -> str:
+        return f"Catagories({catagories_to_str(self.catagories)!r}), {self.to_SCTest()!r}" \
+            + f" # {self.engine_name} gives {self.actual!r}"
+
+
+# the lines a Catagories was made from
+def catagories_to_str(catagories: Catagories) -> str:
+    return "\n".join(
+        catagory.symbol + "=" + catagory.characters for catagory in catagories.catagories
+    )
+
+
+# shrinks a mismatch for as long as the engines still disagree, by dropping nontexts,
+# elements of the contexts, characters of the word and catagories the notation doesn't use
+def minimize_SC_mismatch(mismatch: SCMismatch, engine: SCEngine, reference: SCEngine, catagories: Catagories) -> SCMismatch:
+    def disagree(notation: str, word: str, catagories: Catagories) -> bool:
+        return run_SC_engine(reference, notation, word, catagories) \
+            != run_SC_engine(engine, notation, word, catagories)
+
+    notation = mismatch.notation
+    word = mismatch.word
+
+    sections = notation.split("/")
+    while len(sections) > 3 and disagree("/".join(sections[:-1]), word, catagories):
+        sections = sections[:-1]
+
+    # optionals, brackets and ellipses are removed whole, the _ always stays
+    for section_index in range(2, len(sections)):
+        shrunk = True
+        while shrunk:
+            shrunk = False
+            elements = findall(r"\(.*?\)|\[.*?\]|\.\.\.|.", sections[section_index])
+            for index, element in enumerate(elements):
+                if element == "_":
+                    continue
+                candidate = sections.copy()
+                candidate[section_index] = "".join(elements[:index] + elements[index + 1:])
+                if disagree("/".join(candidate), word, catagories):
+                    sections = candidate
+                    shrunk = True
+                    break
+    notation = "/".join(sections)
+
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for index in range(len(word)):
+            candidate = word[:index] + word[index + 1:]
+            if disagree(notation, candidate, catagories):
+                word = candidate
+                shrunk = True
+                break
+
+    used_catagories = Catagories("\n".join(
+        catagory.symbol + "=" + catagory.characters
+        for catagory in catagories.catagories if catagory.symbol in notation
+    ))
+    if disagree(notation, word, used_catagories):
+        catagories = used_catagories
+
+    return SCMismatch(
+        mismatch.engine_name,
+        catagories,
+        notation,
+        word,
+        run_SC_engine(reference, notation, word, catagories),
+        run_SC_engine(engine, notation, word, catagories),
+    )
+
+
+# compares each engine against the reference SoundChange on random input and times them
+# the reference is the live notation_to_SC, so an optimization has to be added as its own engine
+# or mode next to it, if it replaces the default path the fuzzer can only ever report agreement
+# each mismatch is printed and then run through SCTest with its engine to show the failure
+def fuzz_SC_engines(
+    engines: dict[str, SCEngine],
+    seed: int = 0,
+    rounds: int = 100,
+    lexicon_size: int = 20,
+    reference: SCEngine = notation_to_SC,
+) -> dict[str, SCMismatch | None]:
+    if rounds < 1 or lexicon_size < 1:
+        raise ValueError("rounds and lexicon_size must be at least 1")
+
+    fuzzer = SCFuzzer(seed)
+    all_engines = {"reference": reference, **engines}
+    build_timings = {name: 0.0 for name in all_engines}
+    timings = {name: 0.0 for name in all_engines}
+    mismatches: dict[str, SCMismatch | None] = {name: None for name in engines}
+
+    heading_buffer = "#" * (77 - len(f"Fuzzing seed {seed}"))
+    print(f"\033[0;34m# Fuzzing seed {seed} {heading_buffer}\033[0m")
+
+    for _ in range(rounds):
+        catagories = fuzzer.random_catagories()
+        notation = fuzzer.random_notation(catagories)
+        lexicon = fuzzer.random_lexicon(lexicon_size)
+
+        # every engine is built once per rule and then applied to the same words
+        # after one untimed run so the first engine doesn't pay for filling the regex cache
+        outputs: dict[str, list[str]] = {}
+        for name, engine in all_engines.items():
+            run_SC_engine(engine, notation, lexicon[0], catagories)
+
+            start = perf_counter()
+            SC = build_SC_engine(engine, notation, catagories)
+            build_timings[name] += perf_counter() - start
+
+            start = perf_counter()
+            outputs[name] = [run_SC(SC, word, catagories) for word in lexicon]
+            timings[name] += perf_counter() - start
+
+        # only the first differing pair is kept for each engine
+        for name in engines:
+            if mismatches[name] != None:
+                continue
+            for word, expected, actual in zip(lexicon, outputs["reference"], outputs[name]):
+                if expected == actual:
+                    continue
+                mismatches[name] = minimize_SC_mismatch(
+                    SCMismatch(name, catagories, notation, word, expected, actual),
+                    engines[name], reference, catagories
+                )
+                break
+
+    words_count = rounds * lexicon_size
+    for name, timing in timings.items():
+        words_per_second = words_count / timing if timing > 0 else float("inf")
+        speedup = timings["reference"] / timing if timing > 0 else float("inf")
+        build_ms = build_timings[name] * 1000 / rounds
+        print(f"{name}:\t{words_per_second:.0f} words/s\t{speedup:.2f}x reference\t{build_ms:.3f} ms/rule to build")
+
+    for name, mismatch in mismatches.items():
+        if mismatch == None:
+            print(f"{name} \033[1;32mMatches Reference\033[0m")
+            continue
+        print(f"{name} \033[1;31mDiffers From Reference\033[0m:\t{mismatch}")
+
+    foot_buffer = "#" * 80
+    print(f"\033[0;34m{foot_buffer}\033[0m\n")
+
+    # errors are only outcomes here, SCTest would raise them instead of reporting
+    for name, mismatch in mismatches.items():
+        if mismatch == None or mismatch.expected.startswith("<") or mismatch.actual.startswith("<"):
+            continue
+        mismatch.to_SCTest().test(mismatch.catagories, engine=engines[name])
+
+    return mismatches